@@ -100,7 +100,9 @@ def prepare_emissions_dataset(datasets) -> pd.DataFrame:
     ],
 )
 def predict_emissions(variables, datasets):
-    df = prepare_emissions_dataset()
+    # prepare_emissions_dataset() returns the cached frame, so take a copy
+    # before mutating it below.
+    df = prepare_emissions_dataset().copy()
 
     last_historical_year = df.index.max()
 
@@ -142,8 +144,8 @@ def predict_emissions(variables, datasets):
     df = df.reset_index().melt(id_vars=['Year'], value_name='Emissions', var_name='Sector')
     df.loc[df.Year <= last_historical_year, 'Forecast'] = False
     df.loc[df.Year > last_historical_year, 'Forecast'] = True
-    df['Sector1'] = df.Sector.map(lambda x: x[0])
-    df['Sector2'] = df.Sector.map(lambda x: x[1])
+    df['Sector1'] = df.Sector.map(lambda x: x[0]).astype('category')
+    df['Sector2'] = df.Sector.map(lambda x: x[1]).astype('category')
     df = df.drop(columns='Sector')
 
     return df
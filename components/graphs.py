@@ -1,59 +1,103 @@
 from __future__ import annotations
-from datetime import date
+import logging
 from dataclasses import dataclass
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 import plotly.graph_objs as go
 from colour import Color
 
-from utils import deepupdate
-from utils.data import find_consecutive_start
+from utils.data import find_consecutive_start_cached
 from utils.colors import GHG_MAIN_SECTOR_COLORS
 
 
-def make_layout(**kwargs):
-    params = dict(
-        margin=dict(
-            t=30,
-            r=15,
-            l=60,
-        ),
-        yaxis=dict(
-            rangemode='tozero',
-            hoverformat='.3r',
-            separatethousands=True,
-            anchor='free',
-            domain=[0.02, 1],
-            tickfont=dict(
-                family='HelsinkiGrotesk, Arial',
-                size=14,
-            ),
-            gridwidth=1,
-            gridcolor='#ccc',
-            fixedrange=True,
-        ),
-        xaxis=dict(
-            showgrid=False,
-            showline=False,
-            anchor='free',
-            domain=[0.01, 1],
-            tickfont=dict(
-                family='HelsinkiGrotesk, Arial',
-                size=14,
-            ),
-            gridwidth=1,
-            gridcolor='#ccc',
-            fixedrange=True
+logger = logging.getLogger(__name__)
+
+# Shared defaults for the trace dicts; merged into a dict literal per trace,
+# which is cheaper than calling dict() with keyword arguments.
+_SCATTER_TEMPLATE = {'type': 'scatter'}
+
+
+@lru_cache(maxsize=None)
+def _compute_color(base_hex, luminance_change, forecast):
+    # The inputs come from a small, static palette, so memoize the Color
+    # object construction and luminance arithmetic.
+    color = Color(base_hex)
+
+    if luminance_change:
+        luminance = color.get_luminance()
+        if luminance_change < 0:
+            luminance = luminance * (1 + luminance_change)
+        else:
+            luminance = luminance + (1 - luminance) * luminance_change
+        color.set_luminance(luminance)
+
+    if forecast:
+        # Lighten forecast series by 30 %
+        luminance = color.get_luminance()
+        color.set_luminance(luminance + (1 - luminance) * .3)
+    return color.hex
+
+
+# Constant layout skeleton shared by all graphs; make_layout() copies it
+# instead of rebuilding the nested dicts for every figure.
+_BASE_LAYOUT = dict(
+    margin=dict(
+        t=30,
+        r=15,
+        l=60,
+    ),
+    yaxis=dict(
+        rangemode='tozero',
+        hoverformat='.3r',
+        separatethousands=True,
+        anchor='free',
+        domain=[0.02, 1],
+        tickfont=dict(
+            family='HelsinkiGrotesk, Arial',
+            size=14,
         ),
-        font=dict(
-            family='HelsinkiGrotesk, Open Sans, Arial'
+        gridwidth=1,
+        gridcolor='#ccc',
+        fixedrange=True,
+    ),
+    xaxis=dict(
+        showgrid=False,
+        showline=False,
+        anchor='free',
+        domain=[0.01, 1],
+        tickfont=dict(
+            family='HelsinkiGrotesk, Arial',
+            size=14,
         ),
-        separators=', ',
-        plot_bgcolor='#fff',
-    )
+        gridwidth=1,
+        gridcolor='#ccc',
+        fixedrange=True
+    ),
+    font=dict(
+        family='HelsinkiGrotesk, Open Sans, Arial'
+    ),
+    separators=', ',
+    plot_bgcolor='#fff',
+)
+
+
+def make_layout(**kwargs):
+    # Callers only override the axis dicts one level deep, so a fixed
+    # shallow merge is enough -- no need to deep-walk the base layout.
+    # Copy the mutable leaves so callers can't corrupt the shared template;
+    # anything nested deeper (tickfont, domain) must not be mutated.
+    params = dict(_BASE_LAYOUT)
+    params['margin'] = dict(_BASE_LAYOUT['margin'])
+    params['font'] = dict(_BASE_LAYOUT['font'])
+    for key in ('xaxis', 'yaxis'):
+        if key in kwargs:
+            params[key] = {**_BASE_LAYOUT[key], **kwargs.pop(key)}
+        else:
+            params[key] = dict(_BASE_LAYOUT[key])
     if 'legend' not in kwargs:
         params['showlegend'] = False
-
-    deepupdate(params, kwargs)
+    params.update(kwargs)
     if 'title' in params:
         params['title'] = '<b>%s</b>' % params['title']
 
@@ -87,6 +131,23 @@ class PredictionGraphSeries:
         else:
             assert isinstance(self.column_name, str)
 
+        # Precompute the NumPy arrays used for building the traces so that
+        # get_traces_for_series() can slice them directly without going
+        # through pandas alignment for every call.
+        self._forecast = df['Forecast'].to_numpy(dtype=bool)
+        self._years = df.index.to_numpy()
+        self._values = df[self.column_name].to_numpy(dtype=float)
+        # Cast the year axis to strings once; the trace builders slice this
+        # instead of re-running .astype(str) for every trace.
+        self._x_str = df.index.astype(str).to_numpy()
+        # The forecast years always form a suffix of the sorted year index,
+        # so the historical/forecast split reduces to a single position.
+        if self._forecast.any():
+            self._forecast_start_idx = int(self._forecast.argmax())
+        else:
+            self._forecast_start_idx = len(self._forecast)
+        assert self._forecast[self._forecast_start_idx:].all()
+
     def get_color(self, forecast=False):
         if forecast:
             color = self.forecast_color
@@ -97,24 +158,11 @@ class PredictionGraphSeries:
             return color
 
         if forecast and self.historical_color:
-            color = Color(self.historical_color)
+            base_color = self.historical_color
         else:
-            color = Color(GHG_MAIN_SECTOR_COLORS[self.graph.sector_name])
-
-        if self.luminance_change:
-            luminance = color.get_luminance()
-            if self.luminance_change < 0:
-                luminance = luminance * (1 + self.luminance_change)
-            else:
-                luminance = luminance + (1 - luminance) * self.luminance_change
-            color.set_luminance(luminance)
+            base_color = GHG_MAIN_SECTOR_COLORS[self.graph.sector_name]
 
-        if forecast:
-            # Lighten forecast series by 30 %
-            luminance = color.get_luminance()
-            luminance = luminance + (1 - color.get_luminance()) * .3
-            color.set_luminance(luminance)
-        return color.hex
+        return _compute_color(base_color, self.luminance_change, forecast)
 
 
 @dataclass
@@ -127,12 +175,16 @@ class PredictionGraph:
     fill: bool = False
     stacked: bool = False
     allow_nonconsecutive_years: bool = False
+    # Set when the caller guarantees the y columns have no missing values;
+    # skips the NaN filtering pass when building the traces.
+    dense: bool = False
 
     def __post_init__(self):
         self.series_list = []
         self.min_year = None
         self.max_year = None
         self.forecast_start_year = None
+        self.use_gl = False
 
     def get_traces_for_series(self, series: PredictionGraphSeries, index: int, has_multiple_series: bool):
         df = series.df
@@ -152,21 +204,35 @@ class PredictionGraph:
         if self.allow_nonconsecutive_years:
             start_year = df.index.min()
         else:
-            start_year = find_consecutive_start(df.index)
-
-        y_column = series.column_name
-        hist_series = df.loc[~df.Forecast & (df.index >= start_year), y_column].dropna()
+            # All subsector series of a figure share the same year index,
+            # so the scan result is memoized on the year tuple.
+            start_year = find_consecutive_start_cached(tuple(series._years))
+
+        years, values = series._years, series._values
+
+        # The forecast years are a suffix of the sorted year index, so both
+        # splits come from positional slices instead of boolean masks.
+        split_idx = series._forecast_start_idx
+        start_idx = np.searchsorted(years, start_year)
+        hist_x = series._x_str[start_idx:split_idx]
+        hist_y = values[start_idx:split_idx]
+        if not self.dense:
+            valid = ~np.isnan(hist_y)
+            if not valid.all():
+                hist_x = hist_x[valid]
+                hist_y = hist_y[valid]
 
         hovertemplate = '%{x}: %{y}'
         if self.unit_name:
             hovertemplate += ' %s' % self.unit_name
 
         traces = []
-        line_attrs = dict(width=4)
+        line_attrs = {'width': 4}
         if self.smoothing:
-            line_attrs.update(dict(smoothing=1, shape='spline'))
+            line_attrs['smoothing'] = 1
+            line_attrs['shape'] = 'spline'
 
-        if len(hist_series):
+        if len(hist_x):
             color = series.get_color(forecast=False)
 
             if self.stacked:
@@ -174,27 +240,34 @@ class PredictionGraph:
             if self.fill:
                 trace_attrs['fillcolor'] = color
 
-            hist_trace = dict(
-                type='scatter',
-                x=hist_series.index.astype(str),
-                y=hist_series,
-                name=series.trace_name,
-                hovertemplate=hovertemplate,
-                line=dict(
-                    color=color,
-                    **line_attrs,
-                ),
-                **trace_attrs
-            )
+            hist_trace = {
+                **_SCATTER_TEMPLATE,
+                'x': hist_x,
+                'y': hist_y,
+                'name': series.trace_name,
+                'hovertemplate': hovertemplate,
+                'line': {**line_attrs, 'color': color},
+                **trace_attrs,
+            }
+            if self.use_gl:
+                hist_trace['type'] = 'scattergl'
 
             traces.append(hist_trace)
-            last_hist_year = hist_series.index.max()
-            forecast_series = df.loc[df.Forecast | (df.index == last_hist_year), y_column]
-        else:
-            forecast_series = df.loc[df.Forecast, y_column]
 
-        forecast_series = forecast_series.dropna()
-        if len(forecast_series):
+        forecast_x = series._x_str[split_idx:]
+        forecast_y = values[split_idx:]
+        if not self.dense:
+            valid = ~np.isnan(forecast_y)
+            if not valid.all():
+                forecast_x = forecast_x[valid]
+                forecast_y = forecast_y[valid]
+        if len(hist_x):
+            # Include the last historical year in the forecast trace so
+            # that the traces join up.
+            forecast_x = np.concatenate((hist_x[-1:], forecast_x))
+            forecast_y = np.concatenate((hist_y[-1:], forecast_y))
+
+        if len(forecast_y):
             color = series.get_color(forecast=True)
 
             if self.stacked:
@@ -204,18 +277,19 @@ class PredictionGraph:
             else:
                 line_attrs['dash'] = 'dash'
 
-            forecast_trace = dict(
-                type='scatter',
-                x=forecast_series.index.astype(str),
-                y=forecast_series,
-                name='%s (enn.)' % series.trace_name,
-                hovertemplate=hovertemplate,
-                line=dict(
-                    color=color,
-                    **line_attrs,
-                ),
-                **trace_attrs
-            )
+            forecast_trace = {
+                **_SCATTER_TEMPLATE,
+                'x': forecast_x,
+                'y': forecast_y,
+                'name': '%s (enn.)' % series.trace_name,
+                'hovertemplate': hovertemplate,
+                'line': {**line_attrs, 'color': color},
+                **trace_attrs,
+            }
+            # Dashed lines render poorly in WebGL, so forecast line traces
+            # stay as SVG scatter.
+            if self.use_gl and self.fill:
+                forecast_trace['type'] = 'scattergl'
             traces.insert(0, forecast_trace)
 
         return traces
@@ -239,18 +313,22 @@ class PredictionGraph:
             yattrs['fixedrange'] = True
             yattrs['range'] = [0, self.y_max]
 
+        logger.debug('forecast_start_year=%s', self.forecast_start_year)
+        years = np.arange(self.min_year, self.max_year + 1)
+        # Candidate ticks: every fifth year plus the years we always show.
+        always_shown = (years == self.min_year) | (years == self.max_year) | \
+            (years == self.forecast_start_year)
+        candidates = years[(years % 5 == 0) | always_shown]
+
+        # Enforce a minimum spacing of three years between ticks, except for
+        # the years that are always shown.
         tick_vals = []
-        tick_labels = []
-        today = date.today()
-        print(self.forecast_start_year)
-        for year in range(self.min_year, self.max_year + 1):
-            if year != self.forecast_start_year and tick_vals and year != self.max_year:
+        for year in candidates.tolist():
+            if tick_vals and year not in (self.forecast_start_year, self.max_year):
                 if year - tick_vals[-1] < 3:
                     continue
-                if year % 5 != 0:
-                    continue
             tick_vals.append(year)
-            tick_labels.append(str(year))
+        tick_labels = [str(x) for x in tick_vals]
 
         layout = make_layout(
             title=self.title,
@@ -268,6 +346,12 @@ class PredictionGraph:
             height=450,
         )
 
+        # Render through WebGL when there is enough data that SVG rendering
+        # becomes the bottleneck. scattergl supports neither stackgroup nor
+        # spline smoothing, so stacked and smoothed graphs stay SVG.
+        nr_points = (self.max_year - self.min_year + 1) * len(self.series_list)
+        self.use_gl = not self.stacked and not self.smoothing and nr_points > 500
+
         traces = []
         has_multiple = len(self.series_list) > 1
         for idx, series in enumerate(self.series_list):
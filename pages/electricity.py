@@ -66,14 +66,14 @@ def electricity_consumption_callback(value):
 
     graph = PredictionGraph(
         sector_name='ElectricityConsumption', title='Sähkönkulutus asukasta kohti',
-        unit_name='kWh/as.'
+        unit_name='kWh/as.', dense=True,
     )
     graph.add_series(df=df, trace_name='Sähkönkulutus/as.', column_name='ElectricityConsumptionPerCapita')
     per_capita_fig = graph.get_figure()
 
     graph = PredictionGraph(
         sector_name='ElectricityConsumption', title='Kulutussähkön kulutus',
-        unit_name='GWh',
+        unit_name='GWh', dense=True,
     )
     graph.add_series(df=df, trace_name='Sähkönkulutus', column_name='ElectricityConsumption')
     consumption_fig = graph.get_figure()
@@ -85,7 +85,6 @@ def electricity_consumption_callback(value):
     )
     graph.add_series(df=df, trace_name='Päästökerroin', column_name='EmissionFactor')
     factor_fig = graph.get_figure()
-    print(factor_fig)
 
     graph = PredictionGraph(
         sector_name='ElectricityConsumption', title='Kulutussähkön päästöt',
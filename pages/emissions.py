@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 import dash_bootstrap_components as dbc
 import dash_html_components as html
@@ -38,8 +40,15 @@ def make_sector_fig(df, name, metadata):
 
 def render_page():
     cols = []
-    edf = predict_emissions().set_index('Year')
-    forecast = edf.groupby('Year')['Forecast'].first()
+    edf = predict_emissions()
+    # The forecast flags are the same for every sector; share one plain
+    # array so the per-sector assignments skip index alignment.
+    forecast_arr = edf.groupby('Year')['Forecast'].first().to_numpy()
+    # Pivot the full frame once and slice it per sector below instead of
+    # running a boolean mask and a pivot for each sector separately.
+    pt = edf.pivot_table(index='Year', columns=['Sector1', 'Sector2'], values='Emissions', aggfunc='first')
+    sector_totals = pt.T.groupby(level='Sector1').sum().T
+    edf = edf.set_index('Year')
     graph = PredictionGraph(
         sector_name=None,
         unit_name='kt',
@@ -48,21 +57,25 @@ def render_page():
         fill=True,
         stacked=True
     )
-    for sector_name, sector_metadata in SECTORS.items():
-        df = edf.loc[edf.Sector1 == sector_name, ['Sector2', 'Forecast', 'Emissions']]
-        df = df.pivot(columns='Sector2', values='Emissions')
-        df['Forecast'] = forecast
+
+    def make_sector_card(sector_name, sector_metadata):
+        df = pt.xs(sector_name, axis=1, level='Sector1').copy()
+        df['Forecast'] = forecast_arr
         fig = make_sector_fig(df, sector_name, sector_metadata)
         sector_page = get_page_for_emission_sector(sector_name, None)
-        card = GraphCard(id='emissions-%s' % sector_name, graph=dict(figure=fig), link_to_page=sector_page)
+        return GraphCard(id='emissions-%s' % sector_name, graph=dict(figure=fig), link_to_page=sector_page)
+
+    # The sector figures are independent of each other, so build them in
+    # parallel. The work is mostly pandas/NumPy which releases the GIL.
+    with ThreadPoolExecutor() as executor:
+        cards = list(executor.map(lambda x: make_sector_card(*x), SECTORS.items()))
+
+    for (sector_name, sector_metadata), card in zip(SECTORS.items(), cards):
         cols.append(dbc.Col(card.render(), md=6))
 
         # Add the summed sector to the all emissions graph
-        df = df.drop(columns=['Forecast'])
-        s = df.sum(axis=1)
-        s.name = 'Emissions'
-        df = pd.DataFrame(s)
-        df['Forecast'] = forecast
+        s = sector_totals[sector_name]
+        df = pd.DataFrame({'Emissions': s.to_numpy(), 'Forecast': forecast_arr}, index=s.index)
         graph.add_series(
             df=df, trace_name=sector_metadata['name'], column_name='Emissions',
             historical_color=sector_metadata['color']
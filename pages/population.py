@@ -15,8 +15,8 @@ def generate_population_forecast_graph(pop_df):
     hist_df = pop_df.query('~Forecast')
     hovertemplate = '%{x}: %{y:.0f} 000'
     hist = go.Scatter(
-        x=hist_df.index,
-        y=hist_df.Population / 1000,
+        x=hist_df.index.to_numpy(),
+        y=hist_df.Population.to_numpy() / 1000,
         hovertemplate=hovertemplate,
         mode='lines',
         name='Väkiluku',
@@ -27,8 +27,8 @@ def generate_population_forecast_graph(pop_df):
 
     forecast_df = pop_df.query('Forecast')
     forecast = go.Scatter(
-        x=forecast_df.index,
-        y=forecast_df.Population / 1000,
+        x=forecast_df.index.to_numpy(),
+        y=forecast_df.Population.to_numpy() / 1000,
         hovertemplate=hovertemplate,
         mode='lines',
         name='Väkiluku (enn.)',
@@ -1,3 +1,6 @@
+from functools import lru_cache
+
+
 def find_consecutive_start(values):
     last_val = start_val = values[0]
     for val in values[1:]:
@@ -5,3 +8,9 @@ def find_consecutive_start(values):
             start_val = val
         last_val = val
     return start_val
+
+
+@lru_cache(maxsize=128)
+def find_consecutive_start_cached(values):
+    # Memoized variant; values must be hashable (i.e. a tuple of years).
+    return find_consecutive_start(values)